@@ -54,8 +54,18 @@ def main():
     # 撮影領域を細かく指定したい場合はマージンを詳細にを指定する
     # f = sukusho_summary.StringFinder(element, margin_top=1, margin_bottom=120, margin_left=20, margin_right=20)
 
-    s = sukusho_summary.SukushoSummary(url, prompt=prompt, finder=f)
-    summary = s.browse_site()
+    # サンプルのページは静的なHTMLなので、まずはブラウザを使わずに判定を試みる
+    s = sukusho_summary.SukushoSummary(url, prompt=prompt, finder=f, static_mode=True)
+    summary = s.judge_static()
+
+    if summary is None:
+        # 判定できなかった場合だけドライバーを借りてブラウザで処理する
+        driver = sukusho_summary.borrow_driver()
+        try:
+            s = sukusho_summary.SukushoSummary(url, prompt=prompt, finder=f, driver=driver)
+            summary = s.browse_site()
+        finally:
+            sukusho_summary.return_driver(driver)
 
     logging.debug(f'summary: {summary}')
 
@@ -9,7 +9,7 @@ sample.py - コマンドラインから SukushoSummary を利用するための
 使用法:
 以下のようにコマンドラインから実行します。
 
-    python sample.py --url "https://example.com" --prompt "AIへのプロンプト" --finder-type "xpath" --finder-value "//div[@id='example']" --margin-top 10 --margin-left 10 --margin-right 10 --margin-bottom 10 --ocr-mode --window-width 1024 --window-height 768 --zoom 1.25 --device-emulation "iPhone X"
+    python sample.py --url "https://example.com" --prompt "AIへのプロンプト" --finder-type "xpath" --finder-value "//div[@id='example']" --margin-top 10 --margin-left 10 --margin-right 10 --margin-bottom 10 --ocr-mode --window-width 1024 --window-height 768 --zoom 1.25 --device-emulation "iPhone X" --static-mode
 
 オプション:
     --url (str): スクリーンショットを撮るウェブサイトのURL (必須)
@@ -20,11 +20,12 @@ sample.py - コマンドラインから SukushoSummary を利用するための
     --margin-left (int): 要素の左側のマージン (デフォルト: 0)
     --margin-right (int): 要素の右側のマージン (デフォルト: 0)
     --margin-bottom (int): 要素の下側のマージン (デフォルト: 0)
-    --ocr-mode (bool): OCRモードを使用するかどうか (デフォルト: False)
+    --ocr-mode (bool): OCRで在庫の有無を判定するかどうか。プロンプトが在庫の有無を yes/no で問う場合のみ指定すること (デフォルト: False)
     --window-width (int): ウィンドウの幅 (デフォルト: 1280)
     --window-height (int): ウィンドウの高さ (デフォルト: 800)
     --zoom (float): ウェブページのズームレベル (デフォルト: 1.0)
     --device-emulation (str): デバイスエミュレーションの名前 (例: 'iPhone X')
+    --static-mode (bool): ブラウザを起動する前に静的なHTMLだけで在庫の有無を判定するかどうか (デフォルト: False)
 
 例:
     python sample.py --url "https://example.com" --prompt "AIへのプロンプト" --finder-type "xpath" --finder-value "//div[@id='example']"
@@ -45,11 +46,12 @@ def main():
     parser.add_argument('--margin-left', type=int, default=0, help='要素の左側のマージン')
     parser.add_argument('--margin-right', type=int, default=0, help='要素の右側のマージン')
     parser.add_argument('--margin-bottom', type=int, default=0, help='要素の下側のマージン')
-    parser.add_argument('--ocr-mode', action='store_true', help='OCRモードを使用するかどうか')
+    parser.add_argument('--ocr-mode', action='store_true', help='OCRで在庫の有無を判定するかどうか(プロンプトが在庫の有無を yes/no で問う場合のみ)')
     parser.add_argument('--window-width', type=int, default=1280, help='ウィンドウの幅')
     parser.add_argument('--window-height', type=int, default=800, help='ウィンドウの高さ')
     parser.add_argument('--zoom', type=float, default=1.0, help='ウェブページのズームレベル')
     parser.add_argument('--device-emulation', help='デバイスエミュレーションの名前')
+    parser.add_argument('--static-mode', action='store_true', help='静的なHTMLだけで在庫の有無を判定するかどうか')
 
     args = parser.parse_args()
 
@@ -73,7 +75,8 @@ def main():
         ocr_mode=args.ocr_mode,
         window_size=window_size,
         zoom=args.zoom,
-        device_emulation=args.device_emulation
+        device_emulation=args.device_emulation,
+        static_mode=args.static_mode
     )
 
     try:
@@ -1,26 +1,125 @@
 import base64
+import codecs
+import concurrent.futures
+import functools
+import hashlib
+import io
 import logging
-import tempfile
+import queue
+import re
+import threading
 import os
 
+from collections import namedtuple
+
 from typing import Optional, Callable
 
 from abc import ABC, abstractmethod
+import httpx
+import pytesseract
+from cachetools import TTLCache
 from openai import OpenAI
 from PIL import Image
+from selectolax.parser import HTMLParser, Node
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
 
 _OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 _OPENAI_MODEL_NAME = 'gpt-4-vision-preview'
 _DEFAULT_PROMPT = "このWebサイトのスクリーンショットについて詳しく日本語で解説してください。"
 _DEFAULT_WINDOW_SIZE = (1920, 1080)
-_DEFAULT_IMPLICITLY_WAIT = 10
+_DEFAULT_FIND_TIMEOUT = 5
+_FIND_POLL_FREQUENCY = 0.1
 _DEFAULT_ZOOM = 1.0
+# スクリーンショットの形式と品質。WebP(非可逆)は同等の見た目のJPEGより小さく、OpenAIもそのまま受け付ける。
+# 品質はAIが文字やボタンを読み取るのに十分で、サイズも抑えられる80にする。エンコードはChrome側で行う。
+_SCREENSHOT_FORMAT = 'webp'
+_SCREENSHOT_MIME_TYPE = 'image/webp'
+_SCREENSHOT_QUALITY = 80
+
+# OpenAIのVision(detail=high)は、画像を 2048x2048 に収まるよう縮小したうえで、短辺が768pxになるよう縮小して処理する。
+# 送る前に同じ大きさまで縮小し、モデルが使わないピクセルを送らないようにする(モデルが使うピクセルは削らない)。
+# 長辺が _VISION_LOW_DETAIL_MAX_SIDE 以下に収まる場合は detail=low で送り、課金トークンを抑える。
+_VISION_MAX_LONG_SIDE = 2048
+_VISION_MAX_SHORT_SIDE = 768
+_VISION_LOW_DETAIL_MAX_SIDE = 512
+
+_MAX_CONCURRENCY = 4
+_STATIC_FETCH_TIMEOUT = 10
+# 静的なHTMLでの判定で、見つけた要素から遡る祖先の段数と、判定に使うテキストの長さの上限。
+# ページ全体のような大きな要素で判定すると、別の商品の「売り切れ」などを拾ってしまうため。
+_STATIC_JUDGE_MAX_DEPTH = 2
+_STATIC_JUDGE_MAX_TEXT = 200
+# 表示されないテキストを持つ要素は探さない。ブラウザ側の _FIND_BY_TEXT_SCRIPT と揃えること。
+_META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+_STATIC_SKIP_TAGS = ('script', 'style', 'noscript', 'template')
+# ChromeDriverの一時プロファイルを置くディレクトリ。未指定ならシステムの一時ディレクトリを使う。
+# Dockerの /dev/shm は既定で64MBしかないので、指定する場合は十分な容量のあるtmpfsを指定すること。
+_CHROME_PROFILE_TMPDIR = os.getenv('CHROME_PROFILE_TMPDIR')
+_OCR_LANG = 'jpn'
+
+# 在庫の確認に不要な動画・フォント・広告・解析系の読み込みを止めてページの読み込みを速くする
+_BLOCKED_URLS = [
+    '*.mp4',
+    '*.webm',
+    '*.woff',
+    '*.woff2',
+    '*google-analytics*',
+    '*googletagmanager*',
+    '*doubleclick*',
+    '*facebook.net*',
+]
+
+# 在庫判定に使うキーワード。在庫なしのキーワードが優先される。
+_IN_STOCK_KEYWORDS = ('かごへ入れる', 'カートに入れる')
+_OUT_OF_STOCK_KEYWORDS = ('在庫なし', '売り切れ')
+
+# 使い回すWebDriverのプール。Chromeの起動コストを毎リクエスト払わないようにする。
+_DRIVER_POOL_SIZE = min(os.cpu_count() or 1, _MAX_CONCURRENCY)
+_DRIVER_POOL: queue.Queue[WebDriver] = queue.Queue(maxsize=_DRIVER_POOL_SIZE)
+# 空きドライバーの返却や破棄による枠の解放を待っている借り手を起こすための条件変数
+_DRIVER_POOL_CONDITION = threading.Condition()
+_driver_count = 0
+
+# 同じURL・プロンプト・スクリーンショットに対するAIの回答を短時間キャッシュする
+_SUMMARY_CACHE: TTLCache[str, str] = TTLCache(maxsize=128, ttl=60)
+_SUMMARY_CACHE_LOCK = threading.Lock()
+
+# 要素の位置の取得・スクロール・スクロール後の状態の取得を1回の呼び出しで行う
+_SCROLL_TO_ELEMENT_SCRIPT = """
+const [el, marginLeft, marginTop, zoom] = arguments;
+const r = el.getBoundingClientRect();
+const rect = [r.x + window.pageXOffset, r.y + window.pageYOffset, r.width, r.height];
+window.scrollBy(Math.max(0, (r.x - marginLeft) * zoom), Math.max(0, (r.y - marginTop) * zoom));
+return [rect, [window.pageXOffset, window.pageYOffset, window.devicePixelRatio, window.innerWidth, window.innerHeight]];
+"""
+_VIEWPORT_STATE_SCRIPT = """
+return [window.pageXOffset, window.pageYOffset, window.devicePixelRatio, window.innerWidth, window.innerHeight];
+"""
+# 表示されないテキスト(スクリプト・スタイルなど)は対象外にする。_STATIC_SKIP_TAGS と揃えること。
+_FIND_BY_TEXT_SCRIPT = """
+const skipTags = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT, {
+    acceptNode: (n) => skipTags.has(n.parentElement && n.parentElement.tagName)
+        ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+});
+let node;
+while (node = walker.nextNode()) {
+    if (node.nodeValue.includes(arguments[0])) {
+        return node.parentElement;
+    }
+}
+return null;
+"""
+
+ViewportState = namedtuple('ViewportState', ['x_offset', 'y_offset', 'dpr', 'width', 'height'])
+ElementRect = namedtuple('ElementRect', ['x', 'y', 'width', 'height'])
 
 
 class BaseFinder(ABC):
@@ -60,6 +159,13 @@ class BaseFinder(ABC):
     def find_element(self, driver: WebDriver) -> WebElement:
         pass
 
+    def find_static_node(self, tree: HTMLParser) -> Node | None:
+        """
+        ブラウザを使わずに、取得したHTMLから要素を探す。
+        静的なHTMLで探せないファインダーは None を返す。
+        """
+        return None
+
 
 class XpathFinder(BaseFinder):
     xpath: str
@@ -80,7 +186,25 @@ class StringFinder(BaseFinder):
         self.search_string = search_string
 
     def find_element(self, driver: WebDriver) -> WebElement:
-        return driver.find_element(By.XPATH, f"//*[contains(text(), '{self.search_string}')]")
+        # 文字列は引数として渡すので、引用符のエスケープは不要
+        element = driver.execute_script(_FIND_BY_TEXT_SCRIPT, self.search_string)
+        if element is None:
+            raise NoSuchElementException(f"Element containing text not found: {self.search_string!r}")
+
+        return element
+
+    def find_static_node(self, tree: HTMLParser) -> Node | None:
+        if tree.body is None:
+            return None
+
+        for node in tree.body.traverse():
+            if node.tag in _STATIC_SKIP_TAGS:
+                continue
+
+            if self.search_string in (node.text(deep=False) or ''):
+                return node
+
+        return None
 
 
 class IdFinder(BaseFinder):
@@ -93,6 +217,13 @@ class IdFinder(BaseFinder):
     def find_element(self, driver: WebDriver) -> WebElement:
         return driver.find_element(By.ID, self.id)
 
+    def find_static_node(self, tree: HTMLParser) -> Node | None:
+        for node in tree.css('[id]'):
+            if node.id == self.id:
+                return node
+
+        return None
+
 
 class CssFinder(BaseFinder):
     selector: str
@@ -104,6 +235,9 @@ class CssFinder(BaseFinder):
     def find_element(self, driver: WebDriver) -> WebElement:
         return driver.find_element(By.CSS_SELECTOR, self.selector)
 
+    def find_static_node(self, tree: HTMLParser) -> Node | None:
+        return tree.css_first(self.selector)
+
 
 class ElementNotFoundError(Exception):
     def __init__(self, *args, **kwargs):
@@ -115,10 +249,13 @@ class SukushoSummary:
     ウェブサイトをブラウズし、スクリーンショットを撮り、そのデータをAIモデルに送信するプロセスを管理するクラスです。
     """
     listener: Optional[Callable[[str], None]] = None
+    _viewport: Optional[ViewportState] = None
+    _image_detail: Optional[str] = None
 
     def __init__(self, url: str, *, prompt: str = _DEFAULT_PROMPT,
                  finder: BaseFinder = None, ocr_mode: bool = False, window_size: tuple[int, int] = _DEFAULT_WINDOW_SIZE,
-                 zoom: float = _DEFAULT_ZOOM, device_emulation: str = None):
+                 zoom: float = _DEFAULT_ZOOM, device_emulation: str = None, driver: WebDriver = None,
+                 static_mode: bool = False):
         """
         SukushoSummaryクラスのコンストラクタ。
 
@@ -126,10 +263,18 @@ class SukushoSummary:
             url (str): スクリーンショットを撮るウェブサイトのURL。
             prompt (str, optional): AIモデルに送信するプロンプト。デフォルトは _DEFAULT_PROMPT。
             finder (BaseFinder, optional): 特定の要素を見つけるためのファインダークラス。デフォルトは None。
-            ocr_mode (bool, optional): OCRモードを使用するかどうか。デフォルトは False。
+            ocr_mode (bool, optional): OCRモードを使用するかどうか。
+                有効な場合はスクリーンショットの文字をOCRで読み取り、在庫の有無を判定できれば 'yes' か 'no' を返してAIは使わない。
+                判定できなかった場合やOCRが使えない場合はAIで処理する。
+                プロンプトが在庫の有無を yes/no で問うものである場合にのみ有効にすること。デフォルトは False。
             window_size (tuple[int, int], optional): ウィンドウサイズ（幅、高さ）。デフォルトは _DEFAULT_WINDOW_SIZE。
             zoom (float, optional): ウェブページのズームレベル。デフォルトは _DEFAULT_ZOOM。
             device_emulation (str, optional): デバイスエミュレーションの名前。各種スマホやタブレットなど、Chromeが偽装できるデバイスなら何でも指定可能。デフォルトは None。
+            driver (WebDriver, optional): 使用するWebDriver。指定した場合は終了処理を呼び出し側で行う。device_emulation は無視される。
+                指定しない場合はブラウザが必要になった時点で生成し、処理の終了時に終了する。デフォルトは None。
+            static_mode (bool, optional): ブラウザを起動する前に、静的なHTMLだけで在庫の有無を判定するかどうか。
+                判定できた場合は 'yes' か 'no' を返し、スクリーンショットもAIも使わない。
+                プロンプトが在庫の有無を yes/no で問うものである場合にのみ有効にすること。デフォルトは False。
         """
         self.url = url
         self.prompt = prompt
@@ -138,7 +283,10 @@ class SukushoSummary:
         self.window_size = window_size
         self.zoom = zoom
         self.device_emulation = device_emulation
-        self.driver = self._init_webdriver()
+        self.static_mode = static_mode
+        self._owns_driver = driver is None
+        self._driver_ready = False
+        self.driver = driver
 
     def on_progress(self, listener: Callable[[str], None]):
         if callable(listener):
@@ -153,53 +301,117 @@ class SukushoSummary:
             logging.debug("Listener is not set or message is not a string")
 
     def browse_site(self) -> str:
-        screenshot_path = None
-
         try:
-            self.trigger_progress('サイトをブラウズします...')
-            self.driver.get(self.url)
-            self.driver.execute_script(f"document.body.style.zoom = '{self.zoom}'")
+            result = self.judge_static()
+            if result is not None:
+                return result
 
-            self.trigger_progress('サイトを解析します...')
-            element = self._scroll_to_element()
+            screenshot = self._capture_site()
 
-            self.trigger_progress('撮影領域を検出します...')
-            crop_area = self._determine_crop_area(element)
-
-            self.trigger_progress('スクリーンショットを撮影します...')
-            screenshot_path = self._take_screenshot(crop_area)
-
-            logging.info(f'screenshot_path: {screenshot_path}')
+            cache_key = self._cache_key(screenshot)
+            result = _get_cached_summary(cache_key)
+            if result is not None:
+                return result
 
             self.trigger_progress('スクリーンショットをAIで処理します...')
-            result = self._process_screenshot(screenshot_path)
+            result = self._process_screenshot(screenshot)
+
+            _set_cached_summary(cache_key, result)
             return result
         finally:
+            self._release_webdriver()
+
+    def judge_static(self) -> str | None:
+        """
+        static_mode が有効な場合に、ブラウザを使わずに静的なHTMLだけで在庫の有無を判定する。
+
+        Returns:
+            str | None: 在庫ありなら 'yes'、在庫なしなら 'no'、判定できなければ None。
+        """
+        if not self.static_mode or not self.finder:
+            return None
+
+        if type(self.finder).find_static_node is BaseFinder.find_static_node:
+            # 静的なHTMLで探せないファインダーなら取得するだけ無駄なので、最初からブラウザで処理する
+            return None
+
+        self.trigger_progress('静的なHTMLを解析します...')
+
+        try:
+            resp = get_http_client().get(self.url)
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            logging.info(f'静的なHTMLを取得できませんでした。ブラウザで処理します: {e}')
+            return None
+
+        _apply_meta_charset(resp)
+
+        node = self.finder.find_static_node(HTMLParser(resp.text))
+        if node is None:
+            logging.info('静的なHTMLで要素が見つかりませんでした。ブラウザで処理します。')
+            return None
+
+        # 見つけた要素自身で判定できなければ、ボタンを含む程度の小さな祖先まで範囲を広げる
+        result = None
+        for _ in range(_STATIC_JUDGE_MAX_DEPTH + 1):
+            if node is None or node.tag in ('body', 'html'):
+                break
+
+            text = node.text(separator=' ')
+            if len(text) > _STATIC_JUDGE_MAX_TEXT:
+                break
+
+            result = judge_stock(text)
+            if result is not None:
+                break
+
+            node = node.parent
+
+        logging.info(f'static result: {result}')
+
+        return result
+
+    def _capture_site(self) -> bytes:
+        self._prepare_webdriver()
+
+        self.trigger_progress('サイトをブラウズします...')
+        self.driver.get(self.url)
+        self.driver.execute_script(f"document.body.style.zoom = '{self.zoom}'")
+        self._viewport = None
+
+        self.trigger_progress('サイトを解析します...')
+        element_rect = self._scroll_to_element()
+
+        self.trigger_progress('撮影領域を検出します...')
+        crop_area = self._determine_crop_area(element_rect)
+
+        self.trigger_progress('スクリーンショットを撮影します...')
+        screenshot = self._take_screenshot(crop_area)
+
+        logging.info(f'screenshot size: {len(screenshot)} bytes')
+
+        return screenshot
+
+    def _prepare_webdriver(self):
+        # ブラウザが必要になるまでWebDriverの生成や設定を遅らせる
+        if not self._driver_ready:
+            self.driver = self._init_webdriver(self.driver)
+            self._driver_ready = True
+
+    def _release_webdriver(self):
+        if self._owns_driver and self.driver is not None:
             self.driver.quit()
+            self.driver = None
+            self._driver_ready = False
 
-            # 掃除する場合はここをアンコメント
-            # if screenshot_path and os.path.exists(screenshot_path):
-            #     os.remove(screenshot_path)
-
-    def _init_webdriver(self) -> WebDriver:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--hide-scrollbars")
-        chrome_options.add_argument("--single-process")
-        chrome_options.add_argument("--ignore-certificate-errors")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--mute-audio")
-        chrome_options.add_argument("--lang=ja")
-
-        if self.device_emulation:
-            chrome_options.add_experimental_option("mobileEmulation", {"deviceName": self.device_emulation})
-
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(_DEFAULT_IMPLICITLY_WAIT)
-
-        if self.device_emulation:
+    def _init_webdriver(self, driver: WebDriver = None) -> WebDriver:
+        if driver is None:
+            driver = create_webdriver(self.device_emulation)
+            emulated = bool(self.device_emulation)
+        else:
+            emulated = False
+
+        if emulated:
             # window_size = driver.get_window_size()
             width = driver.execute_script("return window.innerWidth;")
             height = driver.execute_script("return window.innerHeight;")
@@ -210,117 +422,380 @@ class SukushoSummary:
         return driver
 
     def _find_element(self) -> WebElement | None:
+        # 暗黙の待機は使わず、見つからない場合だけ短い間隔で再試行する(初回の試行は待たずに行われる)
+        wait = WebDriverWait(self.driver, _DEFAULT_FIND_TIMEOUT, poll_frequency=_FIND_POLL_FREQUENCY,
+                             ignored_exceptions=[NoSuchElementException])
         try:
-            return self.finder.find_element(self.driver)
-        except NoSuchElementException:
+            return wait.until(self.finder.find_element)
+        except TimeoutException:
             raise ElementNotFoundError(f"指定された要素は見つかりませんでした。: finder={self.finder}")
 
-    def _scroll_to_element(self) -> WebElement | None:
+    def _scroll_to_element(self) -> ElementRect | None:
         if not self.finder:
             return None
 
         element = self._find_element()
 
-        logging.info(f'window_size: {self.window_size}')
-        logging.info(f'element.location: {element.location}')
-        logging.info(f'element.size: {element.size}')
-
-        y_offset = self.driver.execute_script("return window.pageYOffset;")
-        x_offset = self.driver.execute_script("return window.pageXOffset;")
-        dpr = self.driver.execute_script("return window.devicePixelRatio;")
-
-        logging.info(f'dpr: {dpr}')
+        rect, viewport = self.driver.execute_script(
+            _SCROLL_TO_ELEMENT_SCRIPT, element, self.finder.margin_left, self.finder.margin_top, self.zoom)
 
-        scroll_x = max(0, (element.location['x'] - x_offset - self.finder.margin_left) * self.zoom)
-        scroll_y = max(0, (element.location['y'] - y_offset - self.finder.margin_top) * self.zoom)
+        # 要素の座標はスクロール前のドキュメント基準、ビューポートはスクロール後の状態
+        rect = ElementRect(*rect)
+        self._viewport = ViewportState(*viewport)
 
-        logging.info(f'scroll_x: {scroll_x}, scroll_y: {scroll_y}')
-
-        self.driver.execute_script(f"window.scrollBy({scroll_x}, {scroll_y});")
+        logging.info(f'window_size: {self.window_size}')
+        logging.info(f'element_rect: {rect}')
+        logging.info(f'viewport: {self._viewport}')
 
-        return element
+        return rect
 
-    def _determine_crop_area(self, element: WebElement) -> tuple[int, int, int, int] | None:
-        if not element or not (
+    def _determine_crop_area(self, rect: ElementRect) -> tuple[int, int, int, int] | None:
+        if not rect or not (
                 self.finder.margin_top or self.finder.margin_left
                 or self.finder.margin_right or self.finder.margin_bottom):
 
             return None
 
-        y_offset = self.driver.execute_script("return window.pageYOffset;")
-        x_offset = self.driver.execute_script("return window.pageXOffset;")
-        dpr = self.driver.execute_script("return window.devicePixelRatio;")
+        x_offset, y_offset, dpr = self._viewport.x_offset, self._viewport.y_offset, self._viewport.dpr
 
         if self.finder.margin_top:
-            top = max(0, (element.location['y'] - y_offset - self.finder.margin_top) * self.zoom * dpr)
+            top = max(0, (rect.y - y_offset - self.finder.margin_top) * self.zoom * dpr)
         else:
             top = 0
 
         if self.finder.margin_left:
-            left = max(0, (element.location['x'] - x_offset - self.finder.margin_left) * self.zoom * dpr)
+            left = max(0, (rect.x - x_offset - self.finder.margin_left) * self.zoom * dpr)
         else:
             left = 0
 
         if self.finder.margin_right:
-            right = (element.location['x'] - x_offset + element.size['width'] + self.finder.margin_right) * self.zoom * dpr
+            right = (rect.x - x_offset + rect.width + self.finder.margin_right) * self.zoom * dpr
         else:
             # 未指定扱い
             right = 0
 
         if self.finder.margin_bottom:
-            bottom = (element.location['y'] - y_offset + element.size['height'] + self.finder.margin_bottom) * self.zoom * dpr
+            bottom = (rect.y - y_offset + rect.height + self.finder.margin_bottom) * self.zoom * dpr
         else:
             # 未指定扱い
             bottom = 0
 
         return left, top, right, bottom
 
-    def _take_screenshot(self, crop_area: tuple[int, int, int, int]) -> str:
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmpfile:
-            self.driver.save_screenshot(tmpfile.name)
-            if crop_area:
-                with Image.open(tmpfile.name) as img:
-                    right = crop_area[2] or img.width
-                    bottom = crop_area[3] or img.height
-                    new_crop = (crop_area[0], crop_area[1], right, bottom)
+    def _take_screenshot(self, crop_area: tuple[int, int, int, int]) -> bytes:
+        if self._viewport is None:
+            self._viewport = ViewportState(*self.driver.execute_script(_VIEWPORT_STATE_SCRIPT))
+
+        # 切り抜き・縮小・エンコードをChrome側で行い、PNGのエンコード・デコードやディスクへの書き出しを省く
+        params = {
+            'format': _SCREENSHOT_FORMAT,
+            'quality': _SCREENSHOT_QUALITY,
+        }
+
+        if crop_area:
+            clip = self._to_clip(crop_area)
+            params['captureBeyondViewport'] = True
+        else:
+            clip = {
+                'x': self._viewport.x_offset,
+                'y': self._viewport.y_offset,
+                'width': self._viewport.width,
+                'height': self._viewport.height,
+            }
+
+        # 出力画像のサイズは clip のサイズ × scale × devicePixelRatio になる。
+        # OCRモードではアップロード前にOCRを行うので、小さな文字が潰れないよう縮小しない。
+        long_side = max(clip['width'], clip['height']) * self._viewport.dpr
+        short_side = min(clip['width'], clip['height']) * self._viewport.dpr
+        if self.ocr_mode or not short_side:
+            clip['scale'] = 1.0
+        else:
+            clip['scale'] = min(1.0, _VISION_MAX_LONG_SIDE / long_side, _VISION_MAX_SHORT_SIDE / short_side)
+        params['clip'] = clip
+
+        self._image_detail = 'low' if long_side * clip['scale'] <= _VISION_LOW_DETAIL_MAX_SIDE else None
+
+        logging.info(f'clip: {clip}, detail: {self._image_detail}')
+
+        result = self.driver.execute_cdp_cmd('Page.captureScreenshot', params)
 
-                    cropped_img = img.crop(new_crop)
-                    cropped_img.save(tmpfile.name)
+        return base64.b64decode(result['data'])
 
-            return tmpfile.name
+    def _to_clip(self, crop_area: tuple[int, int, int, int]) -> dict:
+        x_offset, y_offset, dpr, inner_width, inner_height = self._viewport
 
-    def _process_screenshot(self, screenshot_path: str) -> str:
-        with open(screenshot_path, 'rb') as f:
-            screenshot_data = f.read()
+        left, top, right, bottom = crop_area
+        right = right or inner_width * dpr
+        bottom = bottom or inner_height * dpr
 
-        result = openai_chat(self.prompt, images=[('image/png', screenshot_data)])
+        # crop_area はビューポート基準のデバイスピクセル、clip はドキュメント基準のCSSピクセル
+        return {
+            'x': left / dpr + x_offset,
+            'y': top / dpr + y_offset,
+            'width': (right - left) / dpr,
+            'height': (bottom - top) / dpr,
+        }
+
+    def _cache_key(self, screenshot: bytes) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for part in (self.url.encode(), self.prompt.encode(), screenshot):
+            h.update(part)
+            h.update(b'\0')
+
+        return h.hexdigest()
+
+    def _judge_by_ocr(self, screenshot: bytes) -> str | None:
+        if not self.ocr_mode:
+            return None
+
+        try:
+            with Image.open(io.BytesIO(screenshot)) as img:
+                text = pytesseract.image_to_string(img, lang=_OCR_LANG)
+        except (pytesseract.TesseractError, pytesseract.TesseractNotFoundError) as e:
+            logging.warning(f'OCRに失敗しました。AIで処理します: {e}')
+            return None
+
+        # jpn のOCR結果は「か ご へ 入 れ る」のように文字間に空白が入ることがあるので、空白を除いてから判定する
+        text = re.sub(r'\s+', '', text)
+
+        logging.info(f'ocr text: {text!r}')
+
+        return judge_stock(text)
+
+    def _process_screenshot(self, screenshot: bytes) -> str:
+        result = self._judge_by_ocr(screenshot)
+        if result is not None:
+            return result
+
+        result = openai_chat(self.prompt, images=[(_SCREENSHOT_MIME_TYPE, screenshot)],
+                             image_detail=self._image_detail)
 
         return result
 
 
-def get_openai_client() -> OpenAI:
-    client = OpenAI(
-        api_key=_OPENAI_API_KEY,
-    )
+def _get_cached_summary(cache_key: str) -> str | None:
+    with _SUMMARY_CACHE_LOCK:
+        result = _SUMMARY_CACHE.get(cache_key)
 
-    return client
+    if result is not None:
+        logging.info(f'cache hit: {cache_key}')
+
+    return result
+
+
+def _set_cached_summary(cache_key: str, summary: str):
+    with _SUMMARY_CACHE_LOCK:
+        _SUMMARY_CACHE[cache_key] = summary
 
 
-def openai_chat(prompt: str, *args, images: list[(str, bytes)] = None):
+def create_webdriver(device_emulation: str = None) -> WebDriver:
     """
-    OpenAI APIを使用してテキスト生成を行う関数。
+    ヘッドレスChromeのWebDriverを生成する関数。
 
     Args:
-        prompt (str): ユーザーからのプロンプト。
-        *args: その他の引数（現在使用されていない）。
-        images (list[(str, bytes)], optional): MIMEタイプと画像のバイナリデータのタプルからなるリスト。
+        device_emulation (str, optional): デバイスエミュレーションの名前。デフォルトは None。
 
     Returns:
-        str: OpenAI APIからの生成されたテキスト。
+        WebDriver: 生成したWebDriver。
+    """
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--hide-scrollbars")
+    chrome_options.add_argument("--single-process")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--lang=ja")
+    # 起動を速くするため、使わない拡張機能やバックグラウンドのサービスを止める
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-sync")
+    chrome_options.add_argument("--disable-default-apps")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+
+    if device_emulation:
+        chrome_options.add_experimental_option("mobileEmulation", {"deviceName": device_emulation})
+
+    # 指定があればChromeDriverが作る一時プロファイルをそのディレクトリ(RAMディスクなど)に置く。
+    # 一時プロファイルなのでドライバーごとに別のディレクトリになり、quit() で削除される。
+    env = None
+    if _CHROME_PROFILE_TMPDIR:
+        env = {**os.environ, 'TMPDIR': _CHROME_PROFILE_TMPDIR}
+
+    service = Service(env=env)
+    driver = webdriver.Chrome(options=chrome_options, service=service)
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': _BLOCKED_URLS})
+    # プールで使い回す間、HTTPキャッシュを有効にしておく
+    driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+
+    return driver
+
+
+def borrow_driver() -> WebDriver:
     """
+    プールからWebDriverを借りる関数。
+    プールが空でまだ上限に達していなければ新しく生成し、上限に達していれば返却されるまで待つ。
 
-    client = get_openai_client()
+    Returns:
+        WebDriver: 借りたWebDriver。使い終わったら return_driver で返却すること。
+    """
+    global _driver_count
+
+    with _DRIVER_POOL_CONDITION:
+        while True:
+            try:
+                return _DRIVER_POOL.get_nowait()
+            except queue.Empty:
+                pass
+
+            if _driver_count < _DRIVER_POOL_SIZE:
+                _driver_count += 1
+                break
+
+            # 返却されるか、破棄されて新しく生成できるようになるまで待つ
+            _DRIVER_POOL_CONDITION.wait()
+
+    try:
+        return create_webdriver()
+    except Exception:
+        with _DRIVER_POOL_CONDITION:
+            _driver_count -= 1
+            _DRIVER_POOL_CONDITION.notify()
+        raise
+
+
+def return_driver(driver: WebDriver):
+    """
+    借りたWebDriverをリセットしてプールに返却する関数。
+    リセットに失敗した場合やセッションが失われている場合は破棄する。
+
+    Args:
+        driver (WebDriver): 返却するWebDriver。
+    """
+    global _driver_count
+
+    try:
+        if not driver.session_id:
+            raise RuntimeError('WebDriver session is lost')
+
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+        with _DRIVER_POOL_CONDITION:
+            _DRIVER_POOL.put_nowait(driver)
+            _DRIVER_POOL_CONDITION.notify()
+    except Exception as e:
+        logging.warning(f'WebDriverを破棄します: {e}')
+
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+        with _DRIVER_POOL_CONDITION:
+            _driver_count -= 1
+            _DRIVER_POOL_CONDITION.notify()
+
+
+def browse_many(specs: list[dict]) -> list[str]:
+    """
+    複数のサイトをプールのWebDriverで並列にブラウズし、それぞれの結果を返す関数。
+    並列数はWebDriverのプールの上限と同じ。
+
+    Args:
+        specs (list[dict]): SukushoSummary のコンストラクタ引数の辞書のリスト(url は必須)。
+            driver はプールから渡されるため指定しないこと。device_emulation は無視される。
+
+    Returns:
+        list[str]: specs と同じ順序の結果のリスト。
+
+    Raises:
+        Exception: いずれかのサイトの処理で発生した例外をそのまま送出する。
+    """
+
+    def _browse(spec: dict) -> str:
+        # 静的なHTMLで判定できる場合はドライバーを借りない
+        result = SukushoSummary(**spec).judge_static()
+        if result is not None:
+            return result
+
+        driver = borrow_driver()
+        try:
+            spec = {**spec, 'static_mode': False}
+            return SukushoSummary(**spec, driver=driver).browse_site()
+        finally:
+            return_driver(driver)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_DRIVER_POOL_SIZE) as executor:
+        return list(executor.map(_browse, specs))
+
+
+def _apply_meta_charset(resp: httpx.Response):
+    # Content-Type に charset がない場合は <meta charset> に従う(Shift_JIS や EUC-JP のページが文字化けしないように)
+    if 'charset=' in resp.headers.get('content-type', '').lower():
+        return
+
+    m = _META_CHARSET_PATTERN.search(resp.content[:4096])
+    if not m:
+        return
+
+    charset = m.group(1).decode('ascii', errors='ignore')
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        logging.info(f'未知の文字コードのため無視します: {charset}')
+        return
 
+    resp.encoding = charset
+
+
+def judge_stock(text: str) -> str | None:
+    """
+    テキストに含まれるキーワードから在庫の有無を判定する関数。
+
+    Args:
+        text (str): 判定対象のテキスト。
+
+    Returns:
+        str | None: 在庫ありなら 'yes'、在庫なしなら 'no'、判定できなければ None。
+    """
+    if any(keyword in text for keyword in _OUT_OF_STOCK_KEYWORDS):
+        return 'no'
+
+    if any(keyword in text for keyword in _IN_STOCK_KEYWORDS):
+        return 'yes'
+
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    client = httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=_STATIC_FETCH_TIMEOUT,
+        headers={'Accept-Language': 'ja'},
+    )
+
+    return client
+
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    # リクエストをまたいでTLSセッションを使い回すため、クライアントは一度だけ生成する
+    client = OpenAI(
+        api_key=_OPENAI_API_KEY,
+        http_client=httpx.Client(http2=True, limits=httpx.Limits(max_keepalive_connections=10)),
+    )
+
+    return client
+
+
+def _build_chat_kwargs(prompt: str, images: list[(str, bytes)] = None, image_detail: str = None) -> dict:
     messages = [
         {
             'role': 'user',
@@ -337,11 +812,16 @@ def openai_chat(prompt: str, *args, images: list[(str, bytes)] = None):
         for image in images:
             mime_type, image_bin = image
             image_b64 = base64.b64encode(image_bin).decode('ascii')
+            image_url = {
+                'url': f'data:{mime_type};base64,{image_b64}'
+            }
+
+            if image_detail:
+                image_url['detail'] = image_detail
+
             messages[0]['content'].append({
                 'type': 'image_url',
-                'image_url': {
-                    'url': f'data:{mime_type};base64,{image_b64}'
-                }
+                'image_url': image_url
             })
 
     kwargs = {
@@ -349,6 +829,26 @@ def openai_chat(prompt: str, *args, images: list[(str, bytes)] = None):
         'messages': messages
     }
 
+    return kwargs
+
+
+def openai_chat(prompt: str, *args, images: list[(str, bytes)] = None, image_detail: str = None):
+    """
+    OpenAI APIを使用してテキスト生成を行う関数。
+
+    Args:
+        prompt (str): ユーザーからのプロンプト。
+        *args: その他の引数（現在使用されていない）。
+        images (list[(str, bytes)], optional): MIMEタイプと画像のバイナリデータのタプルからなるリスト。
+        image_detail (str, optional): 画像の詳細度('low', 'high', 'auto')。デフォルトは None (API側の既定値)。
+
+    Returns:
+        str: OpenAI APIからの生成されたテキスト。
+    """
+
+    client = get_openai_client()
+    kwargs = _build_chat_kwargs(prompt, images, image_detail)
+
     # OpenAI APIで文書生成
     result = client.chat.completions.create(**kwargs)
     return_result = result.choices[0].message.content